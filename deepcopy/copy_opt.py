@@ -69,7 +69,7 @@ def copy(x):
     See the module's __doc__ string for more info.
     """
 
-    cls = type(x)
+    cls = _type(x)
     #if cls in _atomic_types:
     #    return x
 
@@ -127,32 +127,40 @@ if PyStringMap is not None:
 
 del d, t
 
-def deepcopy(x, memo=None, _nil=[]):
+# Types deepcopy() returns unchanged; checked before any memo work.
+_ATOMIC_TYPES = frozenset({type(None), int, float, bool, complex, bytes, str,
+                           type, range, types.BuiltinFunctionType,
+                           types.FunctionType, weakref.ref, property,
+                           type(Ellipsis), type(NotImplemented),
+                           types.CodeType})
+
+# Created here so deepcopy() can bind its lookup; populated below.
+_deepcopy_dispatch = {}
+
+def deepcopy(x, memo=None, _nil=[], _atomic=_ATOMIC_TYPES,
+             _dispatch=_deepcopy_dispatch.get, _id=id, _type=type):
     """Deep copy operation on arbitrary Python objects.
 
     See the module's __doc__ string for more info.
     """
 
-    if memo is None:
-        deepcopy._last_id = None
-        deepcopy._last_obj = None
-        memo = {}
-
-    d = id(x)
-
-    if deepcopy._last_id == d:
-        return deepcopy._last_obj
-
+    cls = _type(x)
+    if cls in _atomic:
+        return x
 
-    y = memo.get(d, _nil)
-    if y is not _nil:
-        deepcopy._last_id = d
-        deepcopy._last_obj = y
-        return y
+    d = _id(x)
 
-    cls = type(x)
+    if memo is None:
+        # A fresh memo cannot contain x, so skip the lookup.  Memos are not
+        # pooled: dict.clear() frees the table and CPython already recycles
+        # dict objects, so reuse measured slower than allocating.
+        memo = {}
+    else:
+        y = memo.get(d, _nil)
+        if y is not _nil:
+            return y
 
-    copier = _deepcopy_dispatch.get(cls)
+    copier = _dispatch(cls)
     if copier is not None:
         y = copier(x, memo)
     else:
@@ -185,13 +193,18 @@ def deepcopy(x, memo=None, _nil=[]):
     # If is its own copy, don't memoize.
     if y is not x:
         memo[d] = y
-        _keep_alive(x, memo) # Make sure x lives at least as long as d
+        # Make sure x lives at least as long as d.  Because objects are
+        # remembered by their id, possibly temporary objects are kept alive
+        # in a list stored at the id of the memo, which should normally not
+        # be used unless someone tries to deepcopy the memo itself.
+        try:
+            memo[_id(memo)].append(x)
+        except KeyError:
+            memo[_id(memo)] = [x]
 
-    deepcopy._last_id = d
-    deepcopy._last_obj = y
     return y
 
-_deepcopy_dispatch = d = {}
+d = _deepcopy_dispatch
 
 def _deepcopy_atomic(x, memo):
     return x
@@ -212,22 +225,46 @@ d[types.FunctionType] = _deepcopy_atomic
 d[weakref.ref] = _deepcopy_atomic
 d[property] = _deepcopy_atomic
 
-def _deepcopy_list(x, memo, deepcopy=deepcopy):
-    y = [None] * len(x)  # Preallocate list
-    memo[id(x)] = y
+_ATOMIC_LIST_SCAN_MAX = 256
 
-    for i, a in enumerate(x):
-        y[i] = deepcopy(a, memo)
+def _shallow_atomic_list(x, _atomic=_ATOMIC_TYPES, _type=type):
+    """Return x[:] if x is short and holds only atomic values, else None.
 
+    The scan is bounded so a long list that fails it late does not pay
+    for it on top of the element-wise copy.
+    """
+    if len(x) > _ATOMIC_LIST_SCAN_MAX:
+        return None
+    for a in x:
+        if _type(a) not in _atomic:
+            return None
+    return x[:]
+
+def _deepcopy_list(x, memo, _id=id):
+    y = _shallow_atomic_list(x)
+    if y is not None:
+        memo[_id(x)] = y
+        return y
+
+    y = [None] * len(x)  # Preallocate list
+    memo[_id(x)] = y
+    _deepcopy_fill(enumerate(x), y, False, memo)
     return y
 d[list] = _deepcopy_list
 
-def _deepcopy_tuple(x, memo, deepcopy=deepcopy):
-    y = [deepcopy(a, memo) for a in x]
+def _deepcopy_tuple(x, memo, deepcopy=deepcopy, _atomic=_ATOMIC_TYPES,
+                    _id=id, _type=type):
+    # A tuple of atomic values is itself immutable: share it.
+    for a in x:
+        if _type(a) not in _atomic:
+            break
+    else:
+        return x
+    y = [a if _type(a) in _atomic else deepcopy(a, memo) for a in x]
     # We're not going to put the tuple in the memo, but it's still important we
     # check for it, in case the tuple contains recursive mutable structures.
     try:
-        return memo[id(x)]
+        return memo[_id(x)]
     except KeyError:
         pass
     for k, j in zip(x, y):
@@ -238,50 +275,153 @@ def _deepcopy_tuple(x, memo, deepcopy=deepcopy):
         y = x
     return y
 d[tuple] = _deepcopy_tuple
-_IMMUTABLE_KEY_TYPES = (int, float, str, bytes, frozenset, type(None))
+# Exact types (subclasses excluded) whose keys and values are shared as-is.
+_IMMUTABLE_KEY_TYPES = frozenset({int, float, str, bytes, frozenset, type(None),
+                                  bool, complex})
+
+_IMMUTABLE_DICT_SCAN_MAX = 64
+
+def _shallow_immutable_dict(x, _immutable=_IMMUTABLE_KEY_TYPES, _type=type):
+    """Return x.copy() if x is small and holds only immutable keys and
+    values, else None.  dict.copy() does the whole copy in C.
+    """
+    if len(x) > _IMMUTABLE_DICT_SCAN_MAX:
+        return None
+    for key, value in x.items():
+        if _type(key) not in _immutable or _type(value) not in _immutable:
+            return None
+    return x.copy()
+
+def _deepcopy_dict(x, memo, _id=id):
+    y = _shallow_immutable_dict(x)
+    if y is not None:
+        memo[_id(x)] = y
+        return y
 
-def _deepcopy_dict(x, memo, deepcopy=deepcopy):
     y = {}
-    memo[id(x)] = y
-    x_items = x.items()
-    for key, value in x_items:
-        # Immutable types do not need   deepcopy
-        if isinstance(key, _IMMUTABLE_KEY_TYPES):
-            key_copy = key
-        else:
-            key_copy = deepcopy(key, memo)
-        if isinstance(value, _IMMUTABLE_KEY_TYPES):
-            value_copy = value
-        else:
-            value_copy = deepcopy(value, memo)
-        y[key_copy] = value_copy
+    memo[_id(x)] = y
+    _deepcopy_fill(iter(x.items()), y, True, memo)
     return y
 
 d[dict] = _deepcopy_dict
 if PyStringMap is not None:
     d[PyStringMap] = _deepcopy_dict
 
+def _deepcopy_fill(items, y, is_dict, memo, deepcopy=deepcopy,
+                   _atomic=_ATOMIC_TYPES, _immutable=_IMMUTABLE_KEY_TYPES,
+                   _nil=[], _id=id, _type=type):
+    """Fill the list or dict copy y from (index or key, value) pairs.
+
+    Nested lists and dicts are copied with an explicit stack instead of
+    recursing through deepcopy().  A nested copy is linked into its parent
+    before it is filled, and the parent's iterator resumes once the child
+    is done, so objects are visited in the same order as by recursion.
+    Everything else (tuples, instances, ...) still goes through deepcopy().
+    """
+    # The memo's keep-alive list (see deepcopy()), looked up once per fill
+    keep_alive = memo.setdefault(_id(memo), []).append
+    stack = [(items, y, is_dict)]
+    push = stack.append
+    while stack:
+        items, y, is_dict = stack[-1]
+        # Dict keys and values share the wider immutable set, as before
+        leaf = _immutable if is_dict else _atomic
+        for k, a in items:
+            if is_dict and _type(k) not in _immutable:
+                k = deepcopy(k, memo)
+            cls = _type(a)
+            if cls in leaf:
+                y[k] = a
+                continue
+            d = _id(a)
+            c = memo.get(d, _nil)
+            if c is not _nil:
+                y[k] = c
+                continue
+            child = None
+            if cls is list:
+                c = _shallow_atomic_list(a)
+                if c is None:
+                    c = [None] * len(a)
+                    child = (enumerate(a), c, False)
+            elif cls is dict:
+                c = _shallow_immutable_dict(a)
+                if c is None:
+                    c = {}
+                    child = (iter(a.items()), c, True)
+            else:
+                y[k] = deepcopy(a, memo)
+                continue
+            # Memoize and keep a alive, as deepcopy() would have
+            memo[d] = c
+            keep_alive(a)
+            y[k] = c
+            if child is not None:
+                push(child)
+                break
+        else:
+            stack.pop()
+
 def _deepcopy_method(x, memo): # Copy instance methods
-    return type(x)(x.__func__, deepcopy(x.__self__, memo))
+    return _type(x)(x.__func__, deepcopy(x.__self__, memo))
 d[types.MethodType] = _deepcopy_method
 
 del d
 
-def _keep_alive(x, memo):
-    """Keeps a reference to the object x in the memo.
-
-    Because we remember objects by their id, we have
-    to assure that possibly temporary objects are kept
-    alive by referencing them.
-    We store a reference at the id of the memo, which should
-    normally not be used unless someone tries to deepcopy
-    the memo itself...
+# Module-level aliases: a module global is found before the builtins
+# fallback. Hot functions above bind these as default arguments instead.
+_type = type
+_id = id
+
+# cls -> tuple of its slot attribute names, base classes first.  Weak keys
+# and plain str values, so classes created at run time are not kept alive
+# by the cache.
+_slot_names_cache = weakref.WeakKeyDictionary()
+
+def _slot_names(cls):
+    names = _slot_names_cache.get(cls)
+    if names is None:
+        names = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get('__slots__', ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for name in slots:
+                if name in ('__dict__', '__weakref__'):
+                    continue
+                if name.startswith('__') and not name.endswith('__'):
+                    # Private names are stored mangled
+                    name = '_%s%s' % (klass.__name__.lstrip('_'), name)
+                names.append(name)
+        names = tuple(names)
+        if names:
+            _slot_names_cache[cls] = names
+    return names
+
+def _is_state_pair(state):
+    """True if state has the pickle (state, slotstate) shape."""
+    return (len(state) == 2 and
+            (state[0] is None or isinstance(state[0], dict)) and
+            (state[1] is None or isinstance(state[1], dict)))
+
+def _is_named_pairs(state, names):
+    """True if state is a sequence of (slot name, value) pairs."""
+    for item in state:
+        if not (_type(item) is tuple and len(item) == 2 and
+                item[0] in names):
+            return False
+    return True
+
+def _slot_values(state, cls):
+    """Return cls's slot names if state holds one value per slot, in
+    __slots__ order, else None.
     """
-    try:
-        memo[id(memo)].append(x)
-    except KeyError:
-        # aha, this is the first one :-)
-        memo[id(memo)]=[x]
+    if _is_state_pair(state):
+        return None
+    names = _slot_names(cls)
+    if not names or len(state) != len(names) or _is_named_pairs(state, names):
+        return None
+    return names
 
 def _reconstruct(x, memo, func, args,
                  state=None, listiter=None, dictiter=None,
@@ -295,7 +435,7 @@ def _reconstruct(x, memo, func, args,
     # Construct object
     y = func(*args)
     if deep:
-        memo[id(x)] = y
+        memo[_id(x)] = y
 
     # Apply state
     if state is not None:
@@ -306,12 +446,19 @@ def _reconstruct(x, memo, func, args,
         if setstate is not None:
             setstate(state)
         else:
+            names = None
+            if _type(state) is tuple:
+                names = _slot_values(state, _type(y))
             # Fast-path common shapes:
             # 1) dict state
             if isinstance(state, dict):
                 y.__dict__.update(state)
+            elif names is not None:
+                # 2) one value per slot, in __slots__ order
+                for name, value in zip(names, state):
+                    setattr(y, name, value)
             else:
-                # 2) (state, slotstate) tuple
+                # 3) (state, slotstate) tuple
                 slotstate = None
                 if isinstance(state, tuple) and len(state) == 2:
                     state, slotstate = state
@@ -340,7 +487,6 @@ def _reconstruct(x, memo, func, args,
     if dictiter is not None:
         if deep:
             y.update({deepcopy(k, memo): deepcopy(v, memo) for (k, v) in dictiter})
-            print("dictier")
         else:
             y.update(dictiter)
 
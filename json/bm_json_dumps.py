@@ -224,6 +224,7 @@ def bench_json_dumps_opt(data):
             encoder.encode(obj)
 
 def bench_orjson_dumps(data):
+    # orjson returns bytes; keep them as bytes (no .decode()) so no str is built
     for obj, count_it in data:
         for _ in count_it:
             orjson.dumps(obj)
@@ -1,9 +1,84 @@
 
 import json
-from typing import Any, Dict, Optional, Set
-import sys
+import weakref
+from collections import OrderedDict
+from operator import attrgetter
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import Any, Dict, List, Optional, Set
 
-class FastCachedJSONEncoder:
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Upper bound on generated per-schema encoders kept by one encoder instance.
+_MAX_SCHEMAS = 64
+
+# A top-level dict signature is compiled on this many sightings (one-off
+# shapes never pay for exec), and only for dicts of up to _MAX_SCHEMA_KEYS.
+_SCHEMA_COMPILE_AFTER = 2
+_MAX_SCHEMA_KEYS = 32
+
+# Upper bound on signatures counted towards _SCHEMA_COMPILE_AFTER.
+_MAX_SCHEMA_CANDIDATES = 1024
+
+# Upper bound on remembered sorted key orders (sort_keys=True) per instance.
+_MAX_SORTED_KEY_SETS = 1024
+
+# Upper bound on the total length of cached subtree strings during one
+# encode(); least recently used entries are evicted beyond it.
+_CACHE_MAX_CHARS = 4 * 1024 * 1024
+
+# Lists at least this long are checked for all-number contents, which are
+# then formatted in a single C-level join.
+_NUMERIC_LIST_MIN = 16
+
+# Exact element type sets that repr() formats exactly like json.dumps()
+_NUMERIC_TYPES = ({int}, {float}, {int, float})
+
+def _encode_null(obj: None) -> str:
+    return 'null'
+
+# repr() of the non-finite floats -> json.dumps() text with allow_nan=True
+_NON_FINITE_FLOATS = {'nan': 'NaN', 'inf': 'Infinity', '-inf': '-Infinity'}
+
+def _encode_float(obj: float) -> str:
+    """Finite floats are their repr(); NaN/Infinity as json.dumps() writes them."""
+    text = float.__repr__(obj)
+    # No finite float's repr contains 'n' (nan, inf)
+    if 'n' in text:
+        return _NON_FINITE_FLOATS[text]
+    return text
+
+def _encode_float_strict(obj: float) -> str:
+    """Like _encode_float(), for allow_nan=False."""
+    text = float.__repr__(obj)
+    if 'n' in text:
+        # Let the standard encoder raise its ValueError
+        raise _Fallback
+    return text
+
+# Cache sentinels: not seen yet / seen once, not cached / currently being
+# encoded (circular ref)
+_MISS = object()
+_SEEN = object()
+_ENCODING = object()
+
+class _Fallback(Exception):
+    """Raised by the fast path for input it cannot encode like json.dumps."""
+
+class RawJSON:
+    """
+    Already-serialized JSON, spliced into FastCachedJSONEncoder output
+    verbatim (simplejson's RawJSON). The text is not validated, and
+    standard-encoder fallbacks cannot serialize it.
+    """
+    __slots__ = ('encoded_json',)
+
+    def __init__(self, encoded_json: str):
+        self.encoded_json = encoded_json
+
+class FastCachedJSONEncoder(json.JSONEncoder):
     """
     A simple, fast JSON encoder that caches serialized strings for repeated objects.
     
@@ -12,32 +87,264 @@ class FastCachedJSONEncoder:
     - Minimal overhead - only cache large objects worth the effort
     - Direct string caching without complex analysis
     - Falls back to standard json.dumps for edge cases
+    - Generated encoders for top-level dicts with a recurring key set
+    - Optional orjson fast path (use_orjson=True)
+    - RawJSON values are emitted as-is instead of re-serialized
+
+    The orjson path is opt-in because its output is not json.dumps':
+    floats needing an exponent are written like 1e16 rather than 1e+16,
+    and NaN/Infinity become null. uuid.UUID and enum.Enum values are
+    serialized (as the UUID string and the member's value) where
+    json.dumps() raises TypeError; orjson has no passthrough flag for them.
+    It is only used with ensure_ascii=False, compact separators, no default
+    and allow_nan=True.
+
+    Being a json.JSONEncoder subclass, it can also be passed as
+    json.dumps(obj, cls=FastCachedJSONEncoder) or to json.dump(). With
+    indent set, encode() hands the whole document to the standard encoder
+    (so RawJSON values cannot be used there).
     """
     
-    def __init__(self, **json_kwargs):
-        """Initialize with same arguments as json.dumps()."""
+    def __init__(self, *, use_orjson: bool = False, **json_kwargs):
+        """
+        Initialize with same arguments as json.dumps(); use_orjson=True
+        accepts orjson's float, UUID and Enum differences for its speed.
+        """
+        # Validates the options and resolves the default separators
+        super().__init__(**json_kwargs)
         self.json_kwargs = json_kwargs
+        self.use_orjson = use_orjson
+        # Standard (C-accelerated) encoder for fallbacks, built once rather
+        # than by every json.dumps(obj, **json_kwargs) call. A default=
+        # argument is passed on as is; an overridden default() is reached
+        # through a weak reference, so the fallback encoder does not keep
+        # self alive (a bound method would make a reference cycle).
+        std_kwargs = json_kwargs
+        if (json_kwargs.get('default') is None and
+                type(self).default is not json.JSONEncoder.default):
+            self_ref = weakref.ref(self)
+            def default(o):
+                return self_ref().default(o)
+            std_kwargs = {**json_kwargs, 'default': default}
+        self._std_encode = json.JSONEncoder(**std_kwargs).encode
+        # (keys, value types) -> generated encoder; kept across encode() calls
+        self._schema_encoders: Dict[tuple, Any] = {}
+        # Signature -> times seen, for signatures not compiled yet
+        self._schema_seen: Dict[tuple, int] = {}
+        # Key set -> sorted key tuple for sort_keys; kept across encode() calls
+        # since the same dict shapes (records, rows) recur between documents
+        self._sorted_keys_cache: Dict[frozenset, tuple] = {}
+        self._orjson_option = self._get_orjson_option()
+        # C string escaper json.dumps() would pick for these settings
+        self._encode_str = (encode_basestring_ascii if self.ensure_ascii
+                            else encode_basestring)
+        # Exact type -> encoder, so each node costs one dict lookup instead of
+        # an isinstance chain; subclasses fall through to isinstance checks.
+        # Scalar encoders return the JSON text, container encoders (unbound,
+        # called with self) append it. Plain functions only: bound methods
+        # of self would make every instance a reference cycle, freed only by
+        # the cyclic GC.
+        self._scalar_encoders = {
+            str: self._encode_str,
+            int: int.__repr__,  # What json uses for exact ints
+            float: _encode_float if self.allow_nan else _encode_float_strict,
+            bool: ('false', 'true').__getitem__,
+            type(None): _encode_null,
+            RawJSON: attrgetter('encoded_json'),
+        }
+        cls = type(self)
+        self._container_encoders = {
+            dict: cls._encode_dict_fast,
+            list: cls._encode_list_fast,
+            tuple: cls._encode_list_fast,
+        }
         self.reset()
+
+    def _get_orjson_option(self) -> Optional[int]:
+        """orjson option flags matching our settings, or None if unsupported."""
+        if (not self.use_orjson or orjson is None or self.ensure_ascii or
+                not self.allow_nan or
+                self.json_kwargs.get('default') is not None or
+                type(self).default is not json.JSONEncoder.default):
+            return None
+        # orjson's indent layout differs from json.dumps', so only compact output
+        if (self.indent is not None or
+                (self.item_separator, self.key_separator) != (',', ':')):
+            return None
+        option = 0
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        # Hand types json.dumps would treat differently back to us
+        return (option | orjson.OPT_PASSTHROUGH_DATACLASS |
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS)
     
     def reset(self):
         """Reset cache for new encoding session."""
-        self._cache: Dict[int, str] = {}
-        self._encoding: set = set()  # Track objects being encoded (circular ref)
+        # id -> encoded string, _SEEN after a first uncached encoding, or
+        # _ENCODING while the object is in progress;
+        # LRU order, bounded by _CACHE_MAX_CHARS of cached strings
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_chars = 0
+        # Key -> escaped key JSON plus key separator; keys repeat across dicts
+        self._key_cache: Dict[str, str] = {}
         self.cache_hits = 0
         self.cache_misses = 0
     
     def encode(self, obj: Any) -> str:
         """
         Encode object to JSON with simple caching for performance.
-        Falls back to standard json.dumps() to ensure correctness.
+        Falls back to the standard encoder to ensure correctness.
         """
         self.reset()
+        if type(obj) is dict and not obj:
+            # '{}' under every setting; skip the signature and schema lookup
+            return '{}'
+        if self.indent is not None:
+            # Indented layout depends on nesting depth, so a cached subtree
+            # string would be wrong elsewhere; leave it to json.dumps' code
+            return self._std_encode(obj)
+        if self._orjson_option is not None:
+            try:
+                return orjson.dumps(obj, option=self._orjson_option).decode()
+            except orjson.JSONEncodeError:
+                pass  # Non-str keys, big ints, unsupported types, ...
         try:
-            result = self._encode_fast(obj)
-            return result
-        except Exception:
-            # If anything goes wrong, fall back to standard encoder
-            return json.dumps(obj, **self.json_kwargs)
+            # Every level appends its tokens to one shared list, which is
+            # joined once here instead of rebuilding strings at each depth
+            out: List[str] = []
+            if type(obj) is dict and len(obj) <= _MAX_SCHEMA_KEYS:
+                signature = (tuple(obj), tuple(map(type, obj.values())))
+                encoder = self._schema_encoders.get(signature)
+                if encoder is None:
+                    encoder = self._schema_encoder(signature)
+                encoder(self, obj, out)
+            else:
+                self._encode_fast(obj, out)
+            return ''.join(out)
+        except (_Fallback, RecursionError):
+            # Unsupported by the fast path (or too deep for it): let the
+            # standard encoder produce the output or the proper error.
+            # Other exceptions come from the standard encoder itself on
+            # subtrees and are already the errors json.dumps would raise.
+            return self._std_encode(obj)
+        finally:
+            # Drop the cached subtree strings now rather than at the next
+            # encode(); cache_hits/cache_misses stay readable
+            self._cache.clear()
+
+    def encode_many(self, objs) -> List[str]:
+        """
+        Encode independent documents in one call; each one is encoded as
+        by encode(), and schema encoders carry over between documents.
+        """
+        encode = self.encode
+        return [encode(obj) for obj in objs]
+
+    def iterencode(self, obj: Any, _one_shot: bool = False):
+        """Yield the cached encoding as a single chunk (used by json.dump())."""
+        yield self.encode(obj)
+    
+    def compile_schema(self, sample_obj: dict):
+        """
+        Generate (or reuse) the encoder for dicts shaped like sample_obj:
+        the same keys in the same order with values of the same types.
+        encode() picks it up without waiting for the shape to recur; the
+        returned callable uses it directly for matching dicts and falls
+        back to encode() for anything else.
+        """
+        if type(sample_obj) is not dict or self.indent is not None:
+            raise TypeError('compile_schema() needs a dict and indent=None')
+        signature = (tuple(sample_obj), tuple(map(type, sample_obj.values())))
+        encoder = self._schema_encoders.get(signature) or self._compile_schema(signature)
+
+        def encode_schema(obj: dict) -> str:
+            # Generated code trusts the signature (None/bool fields are
+            # constants or table lookups), so check it
+            if (type(obj) is not dict or
+                    (tuple(obj), tuple(map(type, obj.values()))) != signature):
+                return self.encode(obj)
+            self.reset()
+            out: List[str] = []
+            try:
+                encoder(self, obj, out)
+            except (_Fallback, RecursionError):
+                return self._std_encode(obj)
+            finally:
+                self._cache.clear()
+            return ''.join(out)
+        return encode_schema
+
+    def _schema_encoder(self, signature: tuple):
+        """Compile a recurring signature; use _encode_fast() until then."""
+        seen = self._schema_seen.get(signature, 0) + 1
+        if seen >= _SCHEMA_COMPILE_AFTER:
+            self._schema_seen.pop(signature, None)
+            return self._compile_schema(signature)
+        if len(self._schema_seen) < _MAX_SCHEMA_CANDIDATES:
+            self._schema_seen[signature] = seen
+        return type(self)._encode_fast
+
+    def _compile_schema(self, signature: tuple):
+        """
+        Generate an encoder for top-level dicts with this (keys, value types)
+        signature. Key JSON and separators are baked into the generated
+        source and scalar values call their type's encoder directly, so
+        runs of scalar fields become a single f-string; only container and
+        subclass values go through _encode_fast() at run time.
+
+        Like the fallback (unbound _encode_fast), the encoder is called as
+        encoder(self, d, out): it is stored on self, so it must not close
+        over self or a bound method of it.
+        """
+        keys, value_types = signature
+        encode_fast = type(self)._encode_fast
+        if len(self._schema_encoders) >= _MAX_SCHEMAS or len(keys) > _MAX_SCHEMA_KEYS:
+            return encode_fast
+        if not all(type(key) is str for key in keys):
+            # Non-string keys need json.dumps key coercion
+            encoder = encode_fast
+        else:
+            # Literal text and {expr} fields of the pending f-string
+            pending: List[str] = []
+            lines = []
+            scalars = []
+            def literal(text):
+                pending.append('f' + repr(text).replace('{', '{{').replace('}', '}}'))
+            def flush():
+                if pending:
+                    lines.append(f"append({' '.join(pending)})")
+                    pending.clear()
+            
+            value_type = dict(zip(keys, value_types))
+            prefix = '{'
+            for i, key in enumerate(sorted(keys) if self.sort_keys else keys):
+                literal(prefix + self._encode_str(key) + self.key_separator)
+                encode_scalar = self._scalar_encoders.get(value_type[key])
+                if encode_scalar is not None:
+                    # Through a local, so key reprs stay out of f-string expressions
+                    lines.append(f'v{i} = d[{key!r}]')
+                    pending.append(f"f'{{s{len(scalars)}(v{i})}}'")
+                    scalars.append(encode_scalar)
+                else:
+                    flush()
+                    lines.append(f'enc(self, d[{key!r}], out)')
+                prefix = self.item_separator
+            literal('}' if keys else '{}')
+            flush()
+            body = ''.join(f'        {line}\n' for line in lines)
+            params = ''.join(f', s{i}' for i in range(len(scalars)))
+            source = (f'def make(enc{params}):\n'
+                      '    def encode_schema(self, d, out):\n'
+                      '        append = out.append\n'
+                      f'{body}'
+                      '    return encode_schema\n')
+            namespace: Dict[str, Any] = {}
+            exec(source, namespace)
+            # Popped, since make's __globals__ is namespace itself: left in,
+            # the pair would be a reference cycle
+            encoder = namespace.pop('make')(encode_fast, *scalars)
+        self._schema_encoders[signature] = encoder
+        return encoder
     
     def _should_cache(self, obj: Any) -> bool:
         """Only cache objects that are worth the overhead."""
@@ -47,115 +354,173 @@ class FastCachedJSONEncoder:
         # Quick size heuristic - only cache substantial objects
         if isinstance(obj, dict):
             return len(obj) >= 3  # At least 3 keys
-        else:  # list
-            return len(obj) >= 5  # At least 5 items
+        return len(obj) >= 5  # list: at least 5 items
     
-    def _encode_fast(self, obj: Any) -> str:
-        """Fast encoding with minimal overhead caching."""
+    def _encode_fast(self, obj: Any, out: List[str]) -> None:
+        """Fast encoding with minimal overhead caching; appends to out."""
+        
+        obj_type = type(obj)
         
         # Handle primitives directly (fastest path)
-        if obj is None:
-            return 'null'
-        elif obj is True:
-            return 'true'
-        elif obj is False:
-            return 'false'
-        elif isinstance(obj, (int, float)):
-            return json.dumps(obj)  # Let json handle number formatting
-        elif isinstance(obj, str):
-            return json.dumps(obj, **{k: v for k, v in self.json_kwargs.items() 
-                                    if k in ['ensure_ascii']})
+        encode_scalar = self._scalar_encoders.get(obj_type)
+        if encode_scalar is not None:
+            out.append(encode_scalar(obj))
+            return
+        
+        encode_container = self._container_encoders.get(obj_type)
+        if encode_container is None:
+            # Subclasses of the supported types
+            if isinstance(obj, (int, float)):
+                out.append(self._std_encode(obj))
+                return
+            elif isinstance(obj, str):
+                out.append(self._encode_str(obj))
+                return
+            elif isinstance(obj, dict):
+                encode_container = self._container_encoders[dict]
+            elif isinstance(obj, list):
+                encode_container = self._container_encoders[list]
+            else:
+                # Unknown type - use standard encoder
+                out.append(self._std_encode(obj))
+                return
         
         # For containers, try caching
         if self._should_cache(obj):
             obj_id = id(obj)
             
-            # Check cache first
-            if obj_id in self._cache:
+            # One lookup answers "seen?", "cached?" and "in progress?"
+            cached = self._cache.get(obj_id, _MISS)
+            if cached is _MISS:
+                # First sighting: most containers are never met again, so
+                # only note the id and skip collapsing and storing a string
+                self._cache[obj_id] = _SEEN
+                encode_container(self, obj, out)
+                return
+            if cached is _ENCODING:
+                # Fall back to standard encoder for circular refs
+                out.append(self._std_encode(obj))
+                return
+            if cached is not _SEEN:
                 self.cache_hits += 1
-                return self._cache[obj_id]
+                self._cache.move_to_end(obj_id)
+                out.append(cached)
+                return
             
-            # Detect circular references
-            if obj_id in self._encoding:
-                # Fall back to standard encoder for circular refs
-                return json.dumps(obj, **self.json_kwargs)
+            # Shared: encode again and cache; an exception aborts the whole encode() and
+            # the next one starts from reset(), so no cleanup is needed
+            self._cache[obj_id] = _ENCODING
+            start = len(out)
+            encode_container(self, obj, out)
             
-            # Encode and cache
-            self._encoding.add(obj_id)
-            try:
-                if isinstance(obj, dict):
-                    result = self._encode_dict_fast(obj)
-                else:  # list
-                    result = self._encode_list_fast(obj)
-                
+            # Collapse this object's tokens into the cached string
+            result = ''.join(out[start:])
+            out[start:] = [result]
+            self.cache_misses += 1
+            if len(result) > _CACHE_MAX_CHARS:
+                del self._cache[obj_id]
+            else:
                 self._cache[obj_id] = result
-                self.cache_misses += 1
-                return result
-            finally:
-                self._encoding.remove(obj_id)
+                self._cache_chars += len(result)
+                if self._cache_chars > _CACHE_MAX_CHARS:
+                    self._evict_cache()
         
         else:
             # Small objects - encode directly without caching overhead
-            if isinstance(obj, dict):
-                return self._encode_dict_fast(obj)
-            elif isinstance(obj, list):
-                return self._encode_list_fast(obj)
-            else:
-                # Unknown type - use standard encoder
-                return json.dumps(obj, **self.json_kwargs)
+            encode_container(self, obj, out)
     
-    def _encode_dict_fast(self, obj: dict) -> str:
+    def _evict_cache(self):
+        """Drop least recently used strings until back under budget."""
+        cache = self._cache
+        while self._cache_chars > _CACHE_MAX_CHARS:
+            obj_id, cached = cache.popitem(last=False)
+            if cached is _ENCODING:
+                # Ancestors still in progress are the oldest entries but
+                # must stay for circular reference detection
+                cache[obj_id] = cached
+            elif cached is not _SEEN:
+                self._cache_chars -= len(cached)
+    
+    def _encode_dict_fast(self, obj: dict, out: List[str]) -> None:
         """Fast dict encoding."""
         if not obj:
-            return '{}'
+            out.append('{}')
+            return
         
-        # Get formatting parameters
-        indent = self.json_kwargs.get('indent')
-        sort_keys = self.json_kwargs.get('sort_keys', False)
-        separators = self.json_kwargs.get('separators', (',', ':' if indent is None else ': '))
+        # Bind formatting parameters and helpers to locals
+        append = out.append
+        item_sep = self.item_separator
+        key_cache = self._key_cache
+        key_token = key_cache.get
+        encode = self._encode_fast
+        scalar_encoder = self._scalar_encoders.get
         
-        # Build key-value pairs
-        items = []
-        keys = sorted(obj.keys()) if sort_keys else obj.keys()
+        # Emit key-value pairs
+        start = len(out)
+        sep = '{'
+        if self.sort_keys:
+            key_set = frozenset(obj)
+            keys = self._sorted_keys_cache.get(key_set)
+            if keys is None:
+                try:
+                    keys = tuple(sorted(key_set))
+                except TypeError:
+                    raise _Fallback from None  # Unorderable mixed key types
+                if len(self._sorted_keys_cache) < _MAX_SORTED_KEY_SETS:
+                    self._sorted_keys_cache[key_set] = keys
+        else:
+            keys = obj.keys()
         
         for key in keys:
-            # Keys must be strings
-            if not isinstance(key, str):
-                # Fall back to standard encoder for non-string keys
-                return json.dumps(obj, **self.json_kwargs)
+            token = key_token(key)
+            if token is None:
+                # Keys must be strings
+                if not isinstance(key, str):
+                    # Fall back to standard encoder for non-string keys
+                    del out[start:]
+                    append(self._std_encode(obj))
+                    return
+                token = key_cache[key] = f'{self._encode_str(key)}{self.key_separator}'
             
-            key_json = json.dumps(key, ensure_ascii=self.json_kwargs.get('ensure_ascii', True))
-            value_json = self._encode_fast(obj[key])
-            items.append(f'{key_json}{separators[1]}{value_json}')
+            append(f'{sep}{token}')
+            value = obj[key]
+            encode_scalar = scalar_encoder(type(value))
+            if encode_scalar is not None:
+                append(encode_scalar(value))
+            else:
+                encode(value, out)
+            sep = item_sep
         
-        # Format output
-        if indent is not None:
-            # Pretty printing
-            indent_str = ' ' * indent if isinstance(indent, int) else '\t'
-            items_str = f'{separators[0]}\n{indent_str}'.join(items)
-            return f'{{\n{indent_str}{items_str}\n}}'
-        else:
-            # Compact
-            return f'{{{separators[0].join(items)}}}'
+        append('}')
     
-    def _encode_list_fast(self, obj: list) -> str:
-        """Fast list encoding."""
+    def _encode_list_fast(self, obj: list, out: List[str]) -> None:
+        """Fast list (or tuple) encoding."""
         if not obj:
-            return '[]'
+            out.append('[]')
+            return
         
-        # Get formatting parameters  
-        indent = self.json_kwargs.get('indent')
-        separators = self.json_kwargs.get('separators', (',', ':' if indent is None else ': '))
+        # Plain number lists (embeddings, telemetry, ...): repr() of an
+        # exact int or finite float is its JSON text
+        if len(obj) >= _NUMERIC_LIST_MIN and set(map(type, obj)) in _NUMERIC_TYPES:
+            numbers = self.item_separator.join(map(repr, obj))
+            # No finite number's repr contains 'n' (nan, inf)
+            if 'n' not in numbers:
+                out.append(f'[{numbers}]')
+                return
         
-        # Encode items
-        items = [self._encode_fast(item) for item in obj]
+        # Emit items
+        append = out.append
+        item_sep = self.item_separator
+        encode = self._encode_fast
+        scalar_encoder = self._scalar_encoders.get
+        sep = '['
+        for item in obj:
+            append(sep)
+            encode_scalar = scalar_encoder(type(item))
+            if encode_scalar is not None:
+                append(encode_scalar(item))
+            else:
+                encode(item, out)
+            sep = item_sep
         
-        # Format output
-        if indent is not None:
-            # Pretty printing
-            indent_str = ' ' * indent if isinstance(indent, int) else '\t'
-            items_str = f'{separators[0]}\n{indent_str}'.join(items)
-            return f'[\n{indent_str}{items_str}\n]'
-        else:
-            # Compact
-            return f'[{separators[0].join(items)}]'
\ No newline at end of file
+        append(']')